@@ -1,19 +1,40 @@
 import logging
+import threading
+import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from core.utils import timing_decorator
 
 logger = logging.getLogger(__name__)
 
+# Cookies are re-read after this long even within one epoch, so cookies a page sets
+# later on its own (timers, XHR) still reach the tools
+COOKIE_CACHE_SECONDS = 2
+
 class BrowserManager:
     def __init__(self):
         self.driver = None
+        # Serialises driver creation so a warm-up thread and the first tool call
+        # never start two Chrome instances
+        self._driver_lock = threading.Lock()
+        # Bumped by every tool action that can change the page or its cookies;
+        # values cached for the current page are only reused within one epoch
+        self.nav_epoch = 0
+        self._cookie_cache = None  # (epoch, monotonic time, cookies, cookie header string)
         logger.info("🌐 BrowserManager initialized")
     
     @timing_decorator
     def get_driver(self):
         """Initialize and return a Chrome WebDriver instance."""
-        if self.driver is None:
+        if self.driver is not None:
+            logger.debug("♻️ Reusing existing Chrome WebDriver instance")
+            return self.driver
+
+        with self._driver_lock:
+            if self.driver is not None:
+                # Created by another thread while we waited for the lock
+                return self.driver
+
             logger.info("🔧 Initializing Chrome WebDriver...")
             options = Options()
             options.add_argument('--no-sandbox')
@@ -43,21 +64,54 @@ class BrowserManager:
             except Exception as e:
                 logger.error(f"❌ Failed to initialize Chrome driver: {e}")
                 raise Exception(f"Failed to initialize Chrome driver: {e}")
-        else:
-            logger.debug("♻️ Reusing existing Chrome WebDriver instance")
-        
+
         return self.driver
     
+    def warm_up(self):
+        """Start Chrome in a background thread so the first tool call doesn't pay for it."""
+        def start():
+            try:
+                self.get_driver()
+            except Exception as e:
+                # The first tool call will retry and report the error to the agent
+                logger.warning(f"⚠️ Browser warm-up failed: {e}")
+
+        threading.Thread(target=start, name="browser-warm-up", daemon=True).start()
+
+    def mark_page_changed(self):
+        """Invalidate everything cached for the current page."""
+        self.nav_epoch += 1
+
+    def _cookies_for_epoch(self):
+        cache = self._cookie_cache
+        if (cache is None or cache[0] != self.nav_epoch
+                or time.monotonic() - cache[1] >= COOKIE_CACHE_SECONDS):
+            cookies = self.get_driver().get_cookies()
+            header = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
+            self._cookie_cache = (self.nav_epoch, time.monotonic(), cookies, header)
+            logger.debug(f"🍪 Fetched {len(cookies)} cookies from the browser")
+        return self._cookie_cache
+
+    def get_cookies(self):
+        """Return the browser's cookies, re-fetched on a new epoch or after COOKIE_CACHE_SECONDS."""
+        return self._cookies_for_epoch()[2]
+
+    def get_cookie_header(self):
+        """Return the browser's cookies formatted as a Cookie header value."""
+        return self._cookies_for_epoch()[3]
+
     @timing_decorator
     def close(self):
         """Close the browser."""
-        if self.driver:
-            logger.info("🔒 Closing Chrome WebDriver...")
-            self.driver.quit()
-            self.driver = None
-            logger.info("✅ Chrome WebDriver closed successfully")
-        else:
-            logger.debug("ℹ️ No WebDriver to close")
+        with self._driver_lock:
+            if self.driver:
+                logger.info("🔒 Closing Chrome WebDriver...")
+                self.driver.quit()
+                self.driver = None
+                self._cookie_cache = None
+                logger.info("✅ Chrome WebDriver closed successfully")
+            else:
+                logger.debug("ℹ️ No WebDriver to close")
 
 # Global browser manager instance
 browser_manager = BrowserManager()
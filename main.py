@@ -1,12 +1,16 @@
 import os
+import atexit
 import importlib
 import logging
+import queue
 import time
 import re
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import trim_messages
+from langchain_core.messages import trim_messages, AIMessage, ToolMessage, HumanMessage, SystemMessage
 from langchain_core.tools import BaseTool
+from langchain_core.runnables import RunnableConfig
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import StateGraph, MessagesState
 from langgraph.prebuilt import ToolNode
@@ -15,17 +19,29 @@ from google.api_core.exceptions import ResourceExhausted
 
 from core.browser import browser_manager
 from core.utils import timing_decorator
+from tools.file_system import MAX_FILE_CHARS
+from tools.fuzzing import cancel_scans
+from tools.web_navigation import MAX_PAGE_SOURCE_CHARS
 
 load_dotenv()
 
-# Configure logging
+# Configure logging. Records are handed to a background listener thread through a queue,
+# so file and console writes never block the agent loop.
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+file_handler = logging.FileHandler('ctf_solver.log')
+file_handler.setFormatter(log_formatter)
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(log_formatter)
+
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, file_handler, stream_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,  # Default level for all libraries
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('ctf_solver.log'),
-        logging.StreamHandler()
-    ]
+    format='%(message)s',  # Final formatting happens in the listener's handlers
+    handlers=[QueueHandler(log_queue)]
 )
 
 # Get our main logger and set it to DEBUG level
@@ -158,6 +174,21 @@ def invoke_llm_with_rate_limit_handling(llm_instance, messages, max_attempts=5):
 
     raise Exception(f"Failed to invoke LLM after {max_attempts} attempts")
 
+# One-letter codes per message: C = AI message with tool_calls, A = other AI message,
+# T = tool response, H = human, S = system, O = anything else
+_SEQUENCE_VIOLATION_RE = re.compile(r'(?<![HT])C|C(?!T)|(?<![TC])T')
+
+def _message_code(msg) -> str:
+    if isinstance(msg, AIMessage):
+        return 'C' if getattr(msg, 'tool_calls', None) else 'A'
+    if isinstance(msg, ToolMessage):
+        return 'T'
+    if isinstance(msg, HumanMessage):
+        return 'H'
+    if isinstance(msg, SystemMessage):
+        return 'S'
+    return 'O'
+
 def validate_message_sequence(messages):
     """Validate message sequence follows Gemini's ordering requirements.
 
@@ -168,49 +199,61 @@ def validate_message_sequence(messages):
     - Tool messages must be followed by either another tool message OR an AI message
     - Tool messages must be preceded by an AI message with tool_calls
 
+    The sequence is encoded as one character per message and checked with a single
+    regex scan; the first violation found is reported.
+
     Returns:
         Tuple of (is_valid: bool, error_message: str)
     """
-    from langchain_core.messages import AIMessage, ToolMessage, HumanMessage
-
-    for i, msg in enumerate(messages):
-        # Check AI messages with tool_calls (function call turn)
-        if isinstance(msg, AIMessage) and hasattr(msg, 'tool_calls') and msg.tool_calls:
-            # Must come after a user turn OR a function response turn
-            if i == 0:
-                return False, f"AI message with tool_calls at position {i} cannot be first (must follow user or tool message)"
-
-            prev_msg = messages[i - 1]
-            # Previous message must be Human or Tool
-            if not (isinstance(prev_msg, (HumanMessage, ToolMessage))):
-                msg_type = type(prev_msg).__name__
-                return False, f"AI message with tool_calls at position {i} must come after HumanMessage or ToolMessage (found {msg_type})"
-
-            # Next message(s) must be tool responses
-            if i + 1 >= len(messages):
-                return False, f"AI message with tool_calls at position {i} has no following tool messages"
-
-            next_msg = messages[i + 1]
-            if not isinstance(next_msg, ToolMessage):
-                msg_type = type(next_msg).__name__
-                return False, f"AI message with tool_calls at position {i} not followed by ToolMessage (found {msg_type})"
-
-        # Check tool messages
-        if isinstance(msg, ToolMessage):
-            # Previous message must be AI message with tool_calls OR another tool message
-            if i == 0:
-                return False, f"ToolMessage at position {i} cannot be first"
-
-            prev_msg = messages[i - 1]
-            # Allow consecutive tool messages (multiple tool responses)
-            if isinstance(prev_msg, ToolMessage):
-                continue
-
-            if not (isinstance(prev_msg, AIMessage) and hasattr(prev_msg, 'tool_calls') and prev_msg.tool_calls):
-                msg_type = type(prev_msg).__name__
-                return False, f"ToolMessage at position {i} not preceded by AI message with tool_calls (found {msg_type})"
-
-    return True, "Valid"
+    codes = "".join([_message_code(msg) for msg in messages])
+    violation = _SEQUENCE_VIOLATION_RE.search(codes)
+    if violation is None:
+        return True, "Valid"
+
+    i = violation.start()
+    prev_type = type(messages[i - 1]).__name__ if i > 0 else None
+
+    if codes[i] == 'T':
+        if i == 0:
+            return False, f"ToolMessage at position {i} cannot be first"
+        return False, f"ToolMessage at position {i} not preceded by AI message with tool_calls (found {prev_type})"
+
+    # Function call turn: must come after a user turn OR a function response turn
+    if i == 0:
+        return False, f"AI message with tool_calls at position {i} cannot be first (must follow user or tool message)"
+    if codes[i - 1] not in "HT":
+        return False, f"AI message with tool_calls at position {i} must come after HumanMessage or ToolMessage (found {prev_type})"
+
+    # Next message(s) must be tool responses
+    if i + 1 >= len(messages):
+        return False, f"AI message with tool_calls at position {i} has no following tool messages"
+    return False, f"AI message with tool_calls at position {i} not followed by ToolMessage (found {type(messages[i + 1]).__name__})"
+
+# Character length per message, keyed by id() and holding a reference to the message so
+# the id cannot be reused while cached. Trimming retries count the same messages many times.
+_CHAR_LEN_CACHE = {}
+_CHAR_LEN_CACHE_SIZE = 4096
+
+def _message_char_len(message) -> int:
+    cached = _CHAR_LEN_CACHE.get(id(message))
+    if cached is not None and cached[0] is message:
+        return cached[1]
+
+    if hasattr(message, 'content') and message.content:
+        length = len(str(message.content))
+    elif isinstance(message, str):
+        length = len(message)
+    else:
+        length = 0
+
+    if len(_CHAR_LEN_CACHE) >= _CHAR_LEN_CACHE_SIZE:
+        _CHAR_LEN_CACHE.clear()
+    _CHAR_LEN_CACHE[id(message)] = (message, length)
+    return length
+
+def estimate_token_count(messages):
+    """Cheap character-based token estimate (roughly 4 chars per token)."""
+    return sum(_message_char_len(message) for message in messages) // 4
 
 def custom_token_counter(messages):
     """Token counter using Google Gemini's native tokenizer."""
@@ -221,14 +264,45 @@ def custom_token_counter(messages):
         return total_tokens
     except Exception as e:
         logger.warning(f"⚠️ Token counting failed: {e}, using character-based estimate")
-        # Fallback to character-based estimation (roughly 4 chars per token)
-        total_chars = 0
-        for message in messages:
-            if hasattr(message, 'content') and message.content:
-                total_chars += len(str(message.content))
-            elif isinstance(message, str):
-                total_chars += len(message)
-        return total_chars // 4
+        return estimate_token_count(messages)
+
+# Token budget for the history sent to Gemini
+TOKEN_LIMIT = 200000
+
+# Re-trimming on every turn shifts the start of the prompt and defeats Gemini's implicit
+# prefix cache, so a trimmed window is reused until TRIM_INTERVAL new messages have arrived.
+TRIM_INTERVAL = 10
+_trim_window = {"start": 0, "anchor_id": None, "length": 0}
+
+def reuse_trim_window(messages):
+    """Return the last trimmed window extended with any new messages.
+
+    Returns:
+        The message window to send, or None if a full re-trim is due
+    """
+    start = _trim_window["start"]
+    if start >= len(messages) or len(messages) - _trim_window["length"] >= TRIM_INTERVAL:
+        return None
+    if start and messages[start].id != _trim_window["anchor_id"]:
+        return None
+
+    window = messages[start:]
+    if start and isinstance(messages[0], SystemMessage):
+        window = [messages[0]] + window
+
+    if estimate_token_count(window) >= TOKEN_LIMIT:
+        return None
+    return window
+
+def remember_trim_window(messages, trimmed_messages):
+    """Record where the trimmed window starts so following turns can reuse it."""
+    kept = len(trimmed_messages)
+    if kept < len(messages) and kept and isinstance(trimmed_messages[0], SystemMessage):
+        kept -= 1
+    start = len(messages) - kept
+    _trim_window["start"] = start
+    _trim_window["anchor_id"] = messages[start].id if start < len(messages) else None
+    _trim_window["length"] = len(messages)
 
 # Load tools dynamically
 tools = load_tools()
@@ -280,12 +354,25 @@ prompt = ChatPromptTemplate.from_messages([
       You MUST provide a valid `wordlist` path (e.g., '/usr/share/wordlists/dirb/common.txt').
       Example: After logging in, you could scan for admin panels with `run_ffuf(target_url='https://current-site.com/FUZZ', wordlist='path/to/wordlist.txt')`.
 
+    - `run_ffuf_batch(urls: list[str], wordlist: str, options: str = "")`:
+      Like `run_ffuf`, but scans the paths of one wordlist under several base URLs in a single run.
+      Give base URLs without 'FUZZ' (e.g. ['https://example.com', 'https://example.com/api']).
+      Prefer it over repeated `run_ffuf` calls when you already know several targets.
+
     - `run_sqlmap(target_url: str, options: str = "--batch --level=1 --risk=1")`:
       Use this tool to test for SQL injection vulnerabilities on a URL with parameters.
       It automatically uses your browser session cookies.
       The `target_url` must be the full, specific URL you want to test (e.g., 'https://example.com/items.php?id=123').
       Only use this when you have identified a specific URL with parameters that looks suspicious.
 
+    - `submit_ffuf(...)` / `submit_sqlmap(...)`:
+      Take the same arguments as `run_ffuf` / `run_sqlmap` but start the scan in the background and return a scan id right away.
+      Prefer these for long scans so you can keep exploring the site while they run.
+
+    - `poll_scan(scan_id: str, wait_seconds: int = 0)`:
+      Returns the results of a background scan once it has finished, or tells you it is still running.
+      If you have nothing else to do until the scan finishes, pass `wait_seconds` (up to 120) to wait for it in one call instead of polling repeatedly.
+
     Always analyze the output of these tools to guide your next steps. If a tool returns an error, do not try it again immediately. Analyze the error and try to solve the problem (e.g., by providing a correct wordlist path).
     
     CRITICAL RULES:
@@ -316,15 +403,10 @@ Analyze the source code or file content CAREFULLY for clues, hidden flags, or vu
 Please start by analyzing the Target URL and any attached files.""")
 ])
 
-def agent_node(state: MessagesState):
-    """Main agent node that processes input and decides on actions."""
-    messages = state["messages"]
-
-    logger.debug(f"📊 Processing {len(messages)} messages before trimming")
-
+def trim_history(messages):
+    """Trim the conversation to the token budget while keeping a valid message sequence."""
     # Use LangChain's built-in trim_messages function with progressive trimming
     # This properly handles tool call/response chains and message ordering
-    TOKEN_LIMIT = 200000
 
     # Try trimming with progressively lower token limits until we get a valid sequence
     trimmed_messages = None
@@ -377,6 +459,22 @@ def agent_node(state: MessagesState):
                 logger.error(f"  [{i}] {msg_type}{' (with tool_calls)' if has_tool_calls else ''}")
             raise ValueError(f"Invalid message sequence for Gemini API: {validation_msg}")
 
+    remember_trim_window(messages, trimmed_messages)
+    return trimmed_messages
+
+def agent_node(state: MessagesState):
+    """Main agent node that processes input and decides on actions."""
+    messages = state["messages"]
+
+    logger.debug(f"📊 Processing {len(messages)} messages before trimming")
+
+    # Only re-trim every TRIM_INTERVAL messages or when the window outgrows the budget
+    trimmed_messages = reuse_trim_window(messages)
+    if trimmed_messages is not None:
+        logger.debug(f"♻️ Reusing trim window: {len(trimmed_messages)} of {len(messages)} messages")
+    else:
+        trimmed_messages = trim_history(messages)
+
     # Log the message sequence for debugging
     logger.debug("📋 Message sequence being sent to Gemini:")
     for i, msg in enumerate(trimmed_messages):
@@ -385,12 +483,15 @@ def agent_node(state: MessagesState):
         logger.debug(f"  [{i}] {msg_type}{' (with tool_calls)' if has_tool_calls else ''}")
 
     # Count tokens in final messages
-    token_count = custom_token_counter(trimmed_messages)
+    token_count = estimate_token_count(trimmed_messages)
     logger.debug(f"📊 Final: {len(trimmed_messages)} messages, ~{token_count} tokens")
 
     response = invoke_llm_with_rate_limit_handling(llm_with_tools, trimmed_messages)
     return {"messages": [response]}
 
+# Markers that end the run, matched case-insensitively without upper-casing the content
+_SOLVED_MARKER_RE = re.compile(r'CHALLENGE SOLVED|FLAG\{|CTF\{', re.IGNORECASE)
+
 def should_continue(state: MessagesState):
     """Determine if the agent should continue working or end."""
     messages = state["messages"]
@@ -402,16 +503,12 @@ def should_continue(state: MessagesState):
     
     # Check if challenge is solved
     if hasattr(last_message, 'content') and last_message.content:
-        # Handle both string and list content
-        if isinstance(last_message.content, str):
-            content = last_message.content.upper()
-        elif isinstance(last_message.content, list):
-            # Join list items into a single string
-            content = " ".join(str(item) for item in last_message.content).upper()
-        else:
-            content = str(last_message.content).upper()
-
-        if "CHALLENGE SOLVED" in content or "FLAG{" in content or "CTF{" in content:
+        # Handle both string and list content (list items are joined into a single string)
+        content = last_message.content
+        if not isinstance(content, str):
+            content = " ".join(map(str, content)) if isinstance(content, list) else str(content)
+
+        if _SOLVED_MARKER_RE.search(content):
             return "__end__"
     
     # Stop after reasonable number of attempts (prevent infinite loops)
@@ -421,12 +518,36 @@ def should_continue(state: MessagesState):
     # If no tools called and challenge not solved, END instead of continuing
     return "__end__"
 
+# Tool results longer than this keep only their head and tail before entering the history,
+# so one huge page does not inflate every later token count and Gemini request. It sits
+# clearly above the tools' own content caps, so a capped page or file plus its header
+# (URL, title, cookies) passes through whole and only uncapped output such as
+# get_page_info's full HTML is cut.
+MAX_TOOL_OUTPUT_CHARS = max(MAX_PAGE_SOURCE_CHARS, MAX_FILE_CHARS) + 20000
+
+tool_node = ToolNode(tools)
+
+def tools_node(state: MessagesState, config: RunnableConfig):
+    """Run the requested tools and bound the size of each result."""
+    result = tool_node.invoke(state, config)
+    for msg in result["messages"]:
+        if isinstance(msg.content, str) and len(msg.content) > MAX_TOOL_OUTPUT_CHARS:
+            original_length = len(msg.content)
+            half = MAX_TOOL_OUTPUT_CHARS // 2
+            msg.content = (
+                f"{msg.content[:half]}\n"
+                f"...(truncated {original_length - MAX_TOOL_OUTPUT_CHARS} chars)...\n"
+                f"{msg.content[-half:]}"
+            )
+            logger.debug(f"✂️ Truncated {msg.name} output from {original_length} to {MAX_TOOL_OUTPUT_CHARS} chars")
+    return result
+
 # Create the graph
 workflow = StateGraph(MessagesState)
 
 # Add nodes
 workflow.add_node("agent", agent_node)
-workflow.add_node("tools", ToolNode(tools))
+workflow.add_node("tools", tools_node)
 
 # Set entry point
 workflow.set_entry_point("agent")
@@ -451,6 +572,9 @@ def run_ctf_solver(url: str, additional_info: str = "", file_list: list = []):
     input_desc = f"URL: {url}, Info: {additional_info[:50]}..., Files: {len(file_list)}"
     logger.info(f"🚀 Starting CTF solver for: {input_desc}")
     
+    # Chrome starts while the prompt is built and the model plans its first step
+    browser_manager.warm_up()
+    
     start_format = time.time()
     messages = prompt.format_messages(
         url=url,
@@ -497,6 +621,8 @@ def run_ctf_solver(url: str, additional_info: str = "", file_list: list = []):
         raise
     
     finally:
+        # Stop background scans so they don't keep hitting the target or leak into the next run
+        cancel_scans()
         # Always close the browser when done
         browser_manager.close()
         logger.info("🔒 Browser closed successfully")
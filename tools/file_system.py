@@ -1,10 +1,16 @@
-import os
 import logging
+from pathlib import Path
 from langchain_core.tools import tool
 from core.utils import timing_decorator
 
 logger = logging.getLogger(__name__)
 
+# Directory that read_local_file is restricted to, resolved once at import
+FILES_DIR = Path("files").resolve()
+
+# Files longer than this are truncated before being returned to the agent
+MAX_FILE_CHARS = 100000
+
 @tool
 @timing_decorator
 def read_local_file(file_path: str) -> str:
@@ -18,26 +24,28 @@ def read_local_file(file_path: str) -> str:
     """
     logger.info(f"📖 Reading local file: {file_path}")
     try:
-        # Security check: Ensure file is within the 'files/' directory
-        base_dir = os.path.abspath("files")
-        target_file = os.path.abspath(file_path)
-        
-        # Check if the target file is within the base directory
-        if not target_file.startswith(base_dir):
+        # Security check: Ensure file is within the 'files/' directory. Resolving symlinks
+        # and comparing path components also rejects siblings like 'files_evil/'.
+        target_file = Path(file_path).resolve()
+        try:
+            target_file.relative_to(FILES_DIR)
+        except ValueError:
             logger.warning(f"⚠️ Access denied: Attempt to read file outside 'files/' directory: {file_path}")
             return "Error: Access denied. You can only read files in the 'files/' directory."
 
-        if not os.path.exists(file_path):
+        if not target_file.exists():
             return f"Error: File not found: {file_path}"
             
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
+        # Read one character past the limit so truncation can be detected without
+        # loading the rest of a large file
+        with open(target_file, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read(MAX_FILE_CHARS + 1)
             
         logger.info(f"✅ Read {len(content)} characters from {file_path}")
         
         # Truncate if too large, but give a generous limit for code files
-        if len(content) > 100000:
-            return f"File content (first 100000 chars):\n{content[:100000]}\n...(truncated)"
+        if len(content) > MAX_FILE_CHARS:
+            return f"File content (first {MAX_FILE_CHARS} chars):\n{content[:MAX_FILE_CHARS]}\n...(truncated)"
             
         return content
         
@@ -1,88 +1,371 @@
+import re
+import json
+import shlex
 import subprocess
 import logging
+import tempfile
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List
 from langchain_core.tools import tool
 from core.browser import browser_manager
 from core.utils import timing_decorator
 
 logger = logging.getLogger(__name__)
 
-@tool
-@timing_decorator
-def run_ffuf(target_url: str, wordlist: str, options: str = "") -> str:
+# Background scans started by submit_ffuf/submit_sqlmap. The workers only wait on
+# subprocesses, so threads overlap scanner time with the agent's own reasoning.
+_SCAN_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="scan")
+_SCAN_JOBS = {}
+# Scanner processes still running, so cancel_scans() can stop them when a solver run ends
+_SCAN_PROCESSES = set()
+_SCAN_PROCESSES_LOCK = threading.Lock()
+# Longest poll_scan will block waiting for a scan to finish
+MAX_POLL_WAIT_SECONDS = 120
+
+FFUF_TIMEOUT = 300
+# ffuf results shown to the agent: the first lines plus the last ones of a long run
+FFUF_SUMMARY_LINES = 20
+# run_ffuf_batch covers several targets in one run, so it gets a longer deadline
+FFUF_BATCH_TIMEOUT = 900
+SQLMAP_TIMEOUT = 600
+# Signals looked for in scanner output, matched line by line as it streams
+_FFUF_WORDLIST_ERROR = re.compile(r"Wordlist file not found|no such file or directory")
+# A fresh finding, or one resumed from sqlmap's session file, which prints no 'is vulnerable'
+_SQLMAP_HIT = re.compile(r"is vulnerable|(?:identified|resumed) the following injection point")
+# Lines of sqlmap output kept for the agent; older lines are dropped as it streams
+SQLMAP_MAX_LINES = 2000
+# sqlmap options that ask for work beyond detection. Runs using them are never cut short,
+# since the data they retrieve is printed after the injection point is reported.
+_SQLMAP_ENUMERATION_FLAGS = {
+    "-a", "--all", "-b", "--banner", "--current-user", "--current-db", "--hostname", "--is-dba",
+    "--users", "--passwords", "--privileges", "--roles", "--dbs", "--tables", "--columns",
+    "--schema", "--count", "--dump", "--dump-all", "--search", "--comments", "--statements",
+    "--sql-query", "--sql-shell", "--sql-file", "--file-read", "--file-write", "--os-cmd",
+    "--os-shell", "--os-pwn",
+}
+
+def _popen_with_deadline(command: list, timeout: float, **popen_kwargs):
+    """Start a scanner with line-buffered stdout and a timer that kills it after timeout seconds.
+
+    Returns the process, the timer and an Event that is set if the deadline was hit.
     """
-    Runs ffuf for content discovery on a URL using the current browser session.
-    - target_url: The full URL to scan. Use 'FUZZ' to indicate the fuzzing point.
-    - wordlist: The path to the wordlist file.
-    - options: Optional additional ffuf command-line arguments.
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, bufsize=1, **popen_kwargs)
+    with _SCAN_PROCESSES_LOCK:
+        _SCAN_PROCESSES.add(process)
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, expire)
+    timer.daemon = True
+    timer.start()
+    return process, timer, timed_out
+
+def _finish_process(process: subprocess.Popen, timer: threading.Timer) -> None:
+    """Cancel the deadline and make sure the scanner has exited, e.g. after an early stop."""
+    timer.cancel()
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    with _SCAN_PROCESSES_LOCK:
+        _SCAN_PROCESSES.discard(process)
+    process.stdout.close()
+
+# Lines kept from each end of ffuf's stderr for error messages. Go's flag parser prints the
+# actual error before a long usage text, so the first lines matter as much as the last.
+STDERR_KEPT_LINES = 10
+
+def _drain_stderr(process: subprocess.Popen):
+    """Read the scanner's stderr on a helper thread so neither pipe can fill up and stall it.
+
+    Returns the thread plus the first lines and a rolling tail of the rest.
     """
+    head = []
+    tail = deque(maxlen=STDERR_KEPT_LINES)
+
+    def drain():
+        for line in process.stderr:
+            (head if len(head) < STDERR_KEPT_LINES else tail).append(line)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    return reader, head, tail
+
+def _stderr_excerpt(head: list, tail: deque) -> str:
+    return ("".join(head) + ("...\n" if tail else "") + "".join(tail)).strip()
+
+def _ffuf_sync(target_url: str, wordlist: str, options: str, cookie_str: str) -> str:
+    """Run ffuf to completion and return the summary shown to the agent."""
     logger.info(f"Running ffuf on {target_url} with wordlist {wordlist}")
     try:
-        # Get cookies from the browser session
-        cookies = browser_manager.get_driver().get_cookies()
-        cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
+        # Pass an argv list instead of a shell string: no intermediate /bin/sh, and cookie
+        # values or URLs cannot be interpreted by a shell
+        command = ["ffuf", "-w", wordlist, "-u", target_url, "-b", cookie_str, *shlex.split(options), "-ac"]
 
-        command = f"ffuf -w {wordlist} -u {target_url} -b \"{cookie_str}\" {options} -ac"
+        logger.info(f"Executing ffuf command: {shlex.join(command)}")
 
-        logger.info(f"Executing ffuf command: {command}")
+        # Execute the command. Output is streamed so only the lines shown to the agent
+        # are kept in memory, however much ffuf prints.
+        process, timer, timed_out = _popen_with_deadline(command, FFUF_TIMEOUT, stderr=subprocess.PIPE)
+        # stderr carries progress and errors
+        stderr_reader, stderr_head, stderr_tail = _drain_stderr(process)
+        head = []
+        tail = deque(maxlen=FFUF_SUMMARY_LINES)
+        total = 0
+        try:
+            for line in process.stdout:
+                if not line.strip():
+                    continue
+                total += 1
+                if len(head) < FFUF_SUMMARY_LINES:
+                    head.append(line)
+                else:
+                    tail.append(line)
+        finally:
+            _finish_process(process, timer)
+            stderr_reader.join()
+            process.stderr.close()
 
-        # Execute the command
-        process = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=300 # 5-minute timeout
-        )
+        if timed_out.is_set():
+            return "Error: ffuf scan timed out after 5 minutes."
 
-        if process.returncode != 0 and "Wordlist file not found" in process.stderr:
+        stderr_text = _stderr_excerpt(stderr_head, stderr_tail)
+        if process.returncode != 0 and _FFUF_WORDLIST_ERROR.search(stderr_text):
             return f"Error: Wordlist file not found at path: {wordlist}. Please provide a valid path."
 
         # Return the captured output, sanitized for the agent
-        output = process.stdout
-        if not output:
+        if not head:
+            if process.returncode != 0:
+                return f"Error: ffuf exited with code {process.returncode}:\n{stderr_text}"
             return "ffuf completed with no output. This may mean nothing was found or an error occurred."
         
-        # Simple summary: return a fixed number of lines
-        summary = "\n".join(output.strip().split("\n")[:20])
-        return f"ffuf scan completed. Output summary:\n{summary}"
+        # Simple summary: the first and last lines of output
+        summary = "".join(head)
+        omitted = total - len(head) - len(tail)
+        if omitted:
+            summary += f"... ({omitted} more lines) ...\n"
+        summary += "".join(tail)
+        return f"ffuf scan completed. Output summary:\n{summary.rstrip()}"
 
     except FileNotFoundError:
         return "Error: `ffuf` command not found. Please ensure it is installed and in your system's PATH."
-    except subprocess.TimeoutExpired:
-        return "Error: ffuf scan timed out after 5 minutes."
     except Exception as e:
         logger.error(f"An unexpected error occurred while running ffuf: {e}")
         return f"An unexpected error occurred: {str(e)}"
 
-@tool
-@timing_decorator
-def run_sqlmap(target_url: str, options: str = "--batch --level=1 --risk=1") -> str:
-    """
-    Runs sqlmap on a target URL to check for SQL injection vulnerabilities.
-    - target_url: The full URL to test, including parameters.
-    - options: Optional additional sqlmap command-line arguments. Defaults to non-interactive mode.
-    """
-    logger.info(f"Running sqlmap on {target_url}")
+def _ffuf_batch_sync(urls: List[str], wordlist: str, options: str, cookie_str: str) -> str:
+    """Fuzz the path under every base URL with one ffuf process and summarise hits per URL."""
+    bases = list(dict.fromkeys(url.strip().rstrip("/") for url in urls if url.strip()))
+    if not bases:
+        return "Error: no URLs given."
+    logger.info(f"Running batched ffuf on {len(bases)} URLs with wordlist {wordlist}")
     try:
-        # Get cookies and format them for sqlmap
-        cookies = browser_manager.get_driver().get_cookies()
-        cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt") as url_file:
+            url_file.write("\n".join(bases) + "\n")
+            url_file.flush()
+
+            # URL and FUZZ are two keyword wordlists, so every path is tried under every base URL.
+            # -ach calibrates per host, as the targets may answer unknown paths differently.
+            command = [
+                "ffuf", "-w", f"{url_file.name}:URL", "-w", f"{wordlist}:FUZZ", "-u", "URL/FUZZ",
+                "-b", cookie_str, *shlex.split(options), "-ac", "-ach", "-json",
+            ]
+            logger.info(f"Executing ffuf command: {shlex.join(command)}")
+
+            process, timer, timed_out = _popen_with_deadline(command, FFUF_BATCH_TIMEOUT, stderr=subprocess.PIPE)
+            stderr_reader, stderr_head, stderr_tail = _drain_stderr(process)
+            # Longest base first, so a hit is credited to the most specific URL it falls under
+            ordered_bases = sorted(bases, key=len, reverse=True)
+            hits = {base: [] for base in bases}
+            counts = dict.fromkeys(bases, 0)
+            records = 0
+            try:
+                for line in process.stdout:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    records += 1
+                    hit_url = record.get("url", "")
+                    base = next((b for b in ordered_bases if hit_url.startswith(b + "/")), None)
+                    if base is None:
+                        continue
+                    counts[base] += 1
+                    if len(hits[base]) < FFUF_SUMMARY_LINES:
+                        hits[base].append(f"{hit_url} [Status: {record.get('status')}, Size: {record.get('length')}]")
+            finally:
+                _finish_process(process, timer)
+                stderr_reader.join()
+                process.stderr.close()
+
+        if timed_out.is_set():
+            return "Error: batched ffuf scan timed out after 15 minutes."
+
+        stderr_text = _stderr_excerpt(stderr_head, stderr_tail)
+        if process.returncode != 0 and _FFUF_WORDLIST_ERROR.search(stderr_text):
+            return f"Error: Wordlist file not found at path: {wordlist}. Please provide a valid path."
 
-        command = f"sqlmap -u \"{target_url}\" --cookie=\"{cookie_str}\" {options}"
+        # A failed run (e.g. an ffuf without -json/-ach, or bad options) must not read as "0 results"
+        if process.returncode != 0 and not records:
+            return f"Error: ffuf exited with code {process.returncode} without reporting results:\n{stderr_text}"
+
+        parts = [f"ffuf batch scan completed on {len(bases)} URLs.\n"]
+        for base in bases:
+            parts.append(f"\n{base}: {counts[base]} results\n")
+            parts.extend(f"  {hit}\n" for hit in hits[base])
+            if counts[base] > len(hits[base]):
+                parts.append(f"  ... ({counts[base] - len(hits[base])} more)\n")
+        return "".join(parts)
+
+    except FileNotFoundError:
+        return "Error: `ffuf` command not found. Please ensure it is installed and in your system's PATH."
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while running ffuf: {e}")
+        return f"An unexpected error occurred: {str(e)}"
+
+def _sqlmap_sync(target_url: str, options: str, cookie_str: str) -> str:
+    """Run sqlmap to completion and return the result shown to the agent."""
+    logger.info(f"Running sqlmap on {target_url}")
+    try:
+        option_args = shlex.split(options)
+        command = ["sqlmap", "-u", target_url, f"--cookie={cookie_str}", *option_args]
+        # A detection-only run has nothing left to report once the injection point and the
+        # back-end fingerprint are printed
+        stop_early = not any(arg.split("=", 1)[0] in _SQLMAP_ENUMERATION_FLAGS for arg in option_args)
         
-        logger.info(f"Executing sqlmap command: {command}")
+        logger.info(f"Executing sqlmap command: {shlex.join(command)}")
         
-        process = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=600)
+        process, timer, timed_out = _popen_with_deadline(command, SQLMAP_TIMEOUT, stderr=subprocess.STDOUT)
+        output = deque(maxlen=SQLMAP_MAX_LINES)
+        vulnerable = False
+        # The injection point summary is framed by two '---' lines after the finding. The
+        # OS, web technology and DBMS fingerprint follow it, ending with 'back-end DBMS: ...'.
+        separators = 0
+        try:
+            for line in process.stdout:
+                output.append(line)
+                if _SQLMAP_HIT.search(line):
+                    vulnerable = True
+                elif vulnerable and separators < 2 and line.strip() == "---":
+                    separators += 1
+                elif stop_early and separators == 2 and line.startswith("back-end DBMS:"):
+                    logger.info("sqlmap reported an injection point, stopping the scan early")
+                    break
+        finally:
+            _finish_process(process, timer)
 
-        if "is vulnerable" in process.stdout:
-            return f"sqlmap found a potential vulnerability at {target_url}. Full output is in the logs. Key findings:\n" + process.stdout
+        if vulnerable:
+            return f"sqlmap found a potential vulnerability at {target_url}. Full output is in the logs. Key findings:\n" + "".join(output)
+        elif timed_out.is_set():
+            return "Error: sqlmap scan timed out after 10 minutes."
         else:
             return "sqlmap scan completed. No obvious vulnerabilities found with the given options."
 
     except FileNotFoundError:
         return "Error: `sqlmap` command not found. Please ensure it is installed and in your system's PATH."
-    except subprocess.TimeoutExpired:
-        return "Error: sqlmap scan timed out after 10 minutes."
     except Exception as e:
         logger.error(f"An unexpected error occurred while running sqlmap: {e}")
         return f"An unexpected error occurred: {str(e)}"
+
+def cancel_scans() -> None:
+    """Stop every queued or running scan and forget all background scan ids.
+
+    Called when a solver run ends, so no scanner keeps hitting the target afterwards
+    and the next run starts without stale ids.
+    """
+    for future in _SCAN_JOBS.values():
+        future.cancel()
+    _SCAN_JOBS.clear()
+    with _SCAN_PROCESSES_LOCK:
+        processes = list(_SCAN_PROCESSES)
+    for process in processes:
+        if process.poll() is None:
+            logger.info(f"Killing scanner process {process.pid}")
+            process.kill()
+
+def _submit_scan(name: str, fn, *args) -> str:
+    scan_id = uuid.uuid4().hex[:8]
+    _SCAN_JOBS[scan_id] = _SCAN_POOL.submit(fn, *args)
+    logger.info(f"Started background {name} scan {scan_id}")
+    return f"{name} scan started in the background with id {scan_id}. Use poll_scan('{scan_id}') to get its results."
+
+@tool
+@timing_decorator
+def run_ffuf(target_url: str, wordlist: str, options: str = "") -> str:
+    """
+    Runs ffuf for content discovery on a URL using the current browser session.
+    - target_url: The full URL to scan. Use 'FUZZ' to indicate the fuzzing point.
+    - wordlist: The path to the wordlist file.
+    - options: Optional additional ffuf command-line arguments.
+    """
+    return _ffuf_sync(target_url, wordlist, options, browser_manager.get_cookie_header())
+
+@tool
+@timing_decorator
+def run_ffuf_batch(urls: List[str], wordlist: str, options: str = "") -> str:
+    """
+    Runs ffuf once for content discovery under several base URLs, using the current browser session.
+    Prefer this over repeated run_ffuf calls when several targets are known.
+    - urls: Base URLs to scan, without 'FUZZ' (e.g. ['https://a.example.com', 'https://example.com/api']).
+    - wordlist: The path to the wordlist file; each entry is appended as a path under every URL.
+    - options: Optional additional ffuf command-line arguments.
+    """
+    return _ffuf_batch_sync(urls, wordlist, options, browser_manager.get_cookie_header())
+
+@tool
+@timing_decorator
+def run_sqlmap(target_url: str, options: str = "--batch --level=1 --risk=1") -> str:
+    """
+    Runs sqlmap on a target URL to check for SQL injection vulnerabilities.
+    - target_url: The full URL to test, including parameters.
+    - options: Optional additional sqlmap command-line arguments. Defaults to non-interactive mode.
+    """
+    return _sqlmap_sync(target_url, options, browser_manager.get_cookie_header())
+
+@tool
+@timing_decorator
+def submit_ffuf(target_url: str, wordlist: str, options: str = "") -> str:
+    """
+    Starts an ffuf scan in the background and returns a scan id immediately.
+    Takes the same arguments as run_ffuf. Use poll_scan with the returned id to get the results.
+    """
+    # Cookies are read here because the browser must not be driven from the scan thread
+    return _submit_scan("ffuf", _ffuf_sync, target_url, wordlist, options, browser_manager.get_cookie_header())
+
+@tool
+@timing_decorator
+def submit_sqlmap(target_url: str, options: str = "--batch --level=1 --risk=1") -> str:
+    """
+    Starts a sqlmap scan in the background and returns a scan id immediately.
+    Takes the same arguments as run_sqlmap. Use poll_scan with the returned id to get the results.
+    """
+    return _submit_scan("sqlmap", _sqlmap_sync, target_url, options, browser_manager.get_cookie_header())
+
+@tool
+@timing_decorator
+def poll_scan(scan_id: str, wait_seconds: int = 0) -> str:
+    """
+    Checks on a background scan started with submit_ffuf or submit_sqlmap.
+    - scan_id: The id returned when the scan was submitted.
+    - wait_seconds: How long to wait for the scan to finish before answering (at most 120).
+      Use this instead of polling repeatedly when there is nothing else to do meanwhile.
+    Returns the scan output once it has finished, otherwise a note that it is still running.
+    """
+    future = _SCAN_JOBS.get(scan_id)
+    if future is None:
+        return f"Error: no background scan with id {scan_id}."
+    try:
+        result = future.result(timeout=min(max(wait_seconds, 0), MAX_POLL_WAIT_SECONDS))
+    except FutureTimeoutError:
+        return f"Scan {scan_id} is still running. Continue with other work and poll again later."
+    del _SCAN_JOBS[scan_id]
+    return result
@@ -1,6 +1,8 @@
 import time
 import logging
 import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,10 +11,138 @@ from selenium.common.exceptions import TimeoutException
 from langchain_core.tools import tool
 
 from core.browser import browser_manager
-from core.utils import timing_decorator
+from core.utils import timing_decorator, timed
 
 logger = logging.getLogger(__name__)
 
+# Selector type -> Selenium locator strategy, with the common spellings pre-populated
+# so most calls resolve without lowercasing
+_BY = {
+    "css": By.CSS_SELECTOR,
+    "CSS": By.CSS_SELECTOR,
+    "xpath": By.XPATH,
+    "XPath": By.XPATH,
+    "XPATH": By.XPATH,
+}
+
+def _resolve_by(selector_type: str):
+    """Return the By strategy for a selector type, or None if it is not supported."""
+    return _BY.get(selector_type) or _BY.get(selector_type.lower())
+
+# Short pause after the document reports complete, for scripts that render on load
+PAGE_SETTLE_SECONDS = 0.1
+# How long click_element waits for a click to start a navigation before treating it as in-page
+CLICK_NAVIGATION_SECONDS = 1
+
+def _wait_for_navigation(driver, old_html, old_url: str, timeout: float) -> None:
+    """Wait until the URL changes or the old <html> element is replaced by a new document.
+
+    Clicks that only update the current page never satisfy this; the wait then just runs out.
+    """
+    went_stale = EC.staleness_of(old_html)
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.current_url != old_url or went_stale(d)
+        )
+    except TimeoutException:
+        logger.debug(f"🔍 No navigation within {timeout}s of the click")
+
+def _wait_for_page_load(driver, timeout: float) -> None:
+    """Wait until the document has finished loading.
+
+    Slow pages are not treated as errors: on timeout the tool carries on with whatever has loaded.
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        logger.warning(f"⏰ Page did not finish loading within {timeout}s, continuing")
+    time.sleep(PAGE_SETTLE_SECONDS)
+
+# navigate_to_url returns at most this much of the page HTML
+MAX_PAGE_SOURCE_CHARS = 100000
+
+# Slices the HTML inside the browser so only the returned part crosses the WebDriver wire;
+# the full length is returned alongside for logging. The doctype is serialised in front,
+# as driver.page_source includes it and outerHTML does not.
+BOUNDED_PAGE_SOURCE_JS = """
+const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+const html = doctype + (document.documentElement ? document.documentElement.outerHTML : '');
+return [html.length, html.slice(0, arguments[0])];
+"""
+
+# find_elements describes at most this many matches
+MAX_ELEMENTS = 10
+
+# Resolves a CSS or XPath selector and reads tag, text and attributes of the first
+# matches in a single WebDriver round-trip instead of several per element
+FIND_ELEMENTS_JS = """
+const [selector, selectorType, limit] = arguments;
+let elements;
+if (selectorType === 'xpath') {
+    const snapshot = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    elements = [];
+    for (let i = 0; i < snapshot.snapshotLength; i++) {
+        elements.push(snapshot.snapshotItem(i));
+    }
+} else {
+    elements = Array.from(document.querySelectorAll(selector));
+}
+return {
+    count: elements.length,
+    elements: elements.slice(0, limit).map(e => ({
+        tag: (e.tagName || e.nodeName).toLowerCase(),
+        text: (e.innerText || '').slice(0, 200),
+        attrs: Object.fromEntries(Array.from(e.attributes || [], a => [a.name, a.value]))
+    }))
+};
+"""
+
+# driver.find_elements used to retry for the driver's 10s implicit wait until something
+# matched; execute_script does not, so empty results are re-polled for up to this long
+FIND_ELEMENTS_WAIT_SECONDS = 10
+
+def _find_elements_in_page(driver, selector: str, by: str) -> dict:
+    """Run FIND_ELEMENTS_JS, polling until at least one element matches or the wait runs out."""
+    args = (FIND_ELEMENTS_JS, selector, "xpath" if by == By.XPATH else "css", MAX_ELEMENTS)
+    found = driver.execute_script(*args)
+    if found['count']:
+        return found
+
+    def matched(d):
+        result = d.execute_script(*args)
+        return result if result['count'] else False
+
+    try:
+        return WebDriverWait(driver, FIND_ELEMENTS_WAIT_SECONDS, poll_frequency=0.1).until(matched)
+    except TimeoutException:
+        return found
+
+# find_elements results for the current page are reused for a few seconds. Any tool
+# action that can change the page bumps the navigation epoch, which retires them; the
+# time limit covers pages that change on their own (timers, polling scripts).
+FIND_CACHE_SECONDS = 5
+_find_cache = {}  # (nav_epoch, selector, by) -> (monotonic time, script result)
+
+def _find_with_cache(driver, selector: str, by: str) -> dict:
+    key = (browser_manager.nav_epoch, selector, by)
+    cached = _find_cache.get(key)
+    if cached and time.monotonic() - cached[0] < FIND_CACHE_SECONDS:
+        logger.debug(f"♻️ Reusing find_elements result for {selector}")
+        return cached[1]
+
+    found = _find_elements_in_page(driver, selector, by)
+    # Empty results are not kept: the elements may still be rendered without any tool
+    # action bumping the epoch, and a retry must look at the page again
+    if not found['count']:
+        return found
+    # Only the current epoch's entries can ever be hit again
+    if _find_cache and next(iter(_find_cache))[0] != key[0]:
+        _find_cache.clear()
+    _find_cache[key] = (time.monotonic(), found)
+    return found
+
 @tool
 @timing_decorator
 def navigate_to_url(url: str) -> str:
@@ -26,36 +156,34 @@ def navigate_to_url(url: str) -> str:
     """
     logger.info(f"🌐 Navigating to {url}")
     try:
-        start_driver = time.time()
-        driver = browser_manager.get_driver()
-        logger.debug(f"⏱️ Driver retrieval took {time.time() - start_driver:.3f}s")
+        with timed("Driver retrieval", logger):
+            driver = browser_manager.get_driver()
         
-        start_nav = time.time()
-        driver.get(url)
-        logger.debug(f"⏱️ Page navigation took {time.time() - start_nav:.3f}s")
+        with timed("Page navigation", logger):
+            browser_manager.mark_page_changed()
+            driver.get(url)
         
         # Wait for page to load
-        logger.debug("⏳ Waiting for page to load (2s)")
-        time.sleep(2)
+        logger.debug("⏳ Waiting for page to load")
+        _wait_for_page_load(driver, 10)
         
         # Get basic page info
-        start_info = time.time()
-        title = driver.title
-        current_url = driver.current_url
-        page_source = driver.page_source
-        cookies = driver.get_cookies()
-        logger.debug(f"⏱️ Page info collection took {time.time() - start_info:.3f}s")
-        
-        logger.info(f"📄 Page loaded: '{title}' ({len(page_source)} chars)")
+        with timed("Page info collection", logger):
+            title = driver.title
+            current_url = driver.current_url
+            page_length, page_source = driver.execute_script(BOUNDED_PAGE_SOURCE_JS, MAX_PAGE_SOURCE_CHARS)
+            cookies = browser_manager.get_cookies()
+        
+        logger.info(f"📄 Page loaded: '{title}' ({page_length} chars)")
         logger.debug(f"🍪 Found {len(cookies)} cookies")
         
-        result = f"""
-URL: {current_url}
-Title: {title}
-Cookies: {cookies}
-Page Source (first 100000 chars): {page_source[:100000]}
-"""
-        return result
+        # Joined once so the page source is copied a single time into the result
+        return "".join((
+            f"\nURL: {current_url}\nTitle: {title}\nCookies: {cookies}\n",
+            f"Page Source (first {MAX_PAGE_SOURCE_CHARS} chars): ",
+            page_source,
+            "\n",
+        ))
         
     except Exception as e:
         logger.error(f"❌ Error navigating to URL {url}: {str(e)}")
@@ -75,53 +203,33 @@ def find_elements(selector: str, selector_type: str = "css") -> str:
     """
     logger.info(f"🔍 Finding elements with {selector_type} selector: {selector}")
     try:
-        start_driver = time.time()
-        driver = browser_manager.get_driver()
-        logger.debug(f"⏱️ Driver retrieval took {time.time() - start_driver:.3f}s")
-        
-        start_find = time.time()
-        if selector_type.lower() == "css":
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-        elif selector_type.lower() == "xpath":
-            elements = driver.find_elements(By.XPATH, selector)
-        else:
+        with timed("Driver retrieval", logger):
+            driver = browser_manager.get_driver()
+        
+        by = _resolve_by(selector_type)
+        if by is None:
             logger.error(f"❌ Invalid selector type: {selector_type}")
             return f"Invalid selector type: {selector_type}. Use 'css' or 'xpath'"
         
-        logger.debug(f"⏱️ Element finding took {time.time() - start_find:.3f}s")
+        with timed("Element finding", logger):
+            found = _find_with_cache(driver, selector, by)
         
-        if not elements:
+        if not found['count']:
             logger.info(f"🔍 No elements found with selector: {selector}")
             return f"No elements found with selector: {selector}"
         
-        logger.info(f"📋 Found {len(elements)} elements")
-        
-        start_process = time.time()
-        result = f"Found {len(elements)} elements:\n"
-        for i, element in enumerate(elements[:10]):  # Limit to first 10 elements
-            try:
-                start_elem = time.time()
-                tag = element.tag_name
-                text = element.text[:200] if element.text else ""
-                attrs = driver.execute_script("""
-                    var items = {};
-                    for (index = 0; index < arguments[0].attributes.length; ++index) {
-                        items[arguments[0].attributes[index].name] = arguments[0].attributes[index].value;
-                    }
-                    return items;
-                """, element)
-                
-                result += f"\nElement {i+1}:\n"
-                result += f"  Tag: {tag}\n"
-                result += f"  Text: {text}\n"
-                result += f"  Attributes: {attrs}\n"
-                logger.debug(f"⏱️ Element {i+1} processing took {time.time() - start_elem:.3f}s")
-            except Exception as e:
-                logger.warning(f"⚠️ Error getting element {i+1} info: {str(e)}")
-                result += f"  Error getting element info: {str(e)}\n"
-        
-        logger.debug(f"⏱️ Element processing took {time.time() - start_process:.3f}s")
-        return result
+        logger.info(f"📋 Found {found['count']} elements")
+        
+        parts = [f"Found {found['count']} elements:\n"]
+        for i, element in enumerate(found['elements']):
+            parts.append(
+                f"\nElement {i+1}:\n"
+                f"  Tag: {element['tag']}\n"
+                f"  Text: {element['text']}\n"
+                f"  Attributes: {element['attrs']}\n"
+            )
+        
+        return "".join(parts)
         
     except Exception as e:
         logger.error(f"❌ Error finding elements: {str(e)}")
@@ -141,31 +249,28 @@ def click_element(selector: str, selector_type: str = "css") -> str:
     """
     logger.info(f"🖱️ Clicking element with {selector_type} selector: {selector}")
     try:
-        start_driver = time.time()
-        driver = browser_manager.get_driver()
-        logger.debug(f"⏱️ Driver retrieval took {time.time() - start_driver:.3f}s")
-        
-        start_wait = time.time()
-        if selector_type.lower() == "css":
-            element = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-            )
-        elif selector_type.lower() == "xpath":
-            element = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, selector))
-            )
-        else:
+        with timed("Driver retrieval", logger):
+            driver = browser_manager.get_driver()
+        
+        by = _resolve_by(selector_type)
+        if by is None:
             logger.error(f"❌ Invalid selector type: {selector_type}")
             return f"Invalid selector type: {selector_type}. Use 'css' or 'xpath'"
         
-        logger.debug(f"⏱️ Element wait took {time.time() - start_wait:.3f}s")
+        with timed("Element wait", logger):
+            element = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, selector)))
         
-        start_click = time.time()
-        element.click()
-        logger.debug(f"⏱️ Click action took {time.time() - start_click:.3f}s")
+        with timed("Click action", logger):
+            old_url = driver.current_url
+            old_html = driver.execute_script("return document.documentElement")
+            browser_manager.mark_page_changed()
+            element.click()
         
-        logger.debug("⏳ Waiting for page changes (1s)")
-        time.sleep(1)  # Wait for any page changes
+        # The old document still reports readyState 'complete' right after the click,
+        # so first give a navigation the chance to start, then wait for the new page
+        logger.debug("⏳ Waiting for page changes")
+        _wait_for_navigation(driver, old_html, old_url, CLICK_NAVIGATION_SECONDS)
+        _wait_for_page_load(driver, 5)
         
         new_url = driver.current_url
         logger.info(f"✅ Element clicked successfully. New URL: {new_url}")
@@ -193,29 +298,21 @@ def fill_form_field(selector: str, value: str, selector_type: str = "css") -> st
     """
     logger.info(f"📝 Filling form field {selector} with value: {value}")
     try:
-        start_driver = time.time()
-        driver = browser_manager.get_driver()
-        logger.debug(f"⏱️ Driver retrieval took {time.time() - start_driver:.3f}s")
-        
-        start_wait = time.time()
-        if selector_type.lower() == "css":
-            element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-            )
-        elif selector_type.lower() == "xpath":
-            element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, selector))
-            )
-        else:
+        with timed("Driver retrieval", logger):
+            driver = browser_manager.get_driver()
+        
+        by = _resolve_by(selector_type)
+        if by is None:
             logger.error(f"❌ Invalid selector type: {selector_type}")
             return f"Invalid selector type: {selector_type}. Use 'css' or 'xpath'"
         
-        logger.debug(f"⏱️ Element wait took {time.time() - start_wait:.3f}s")
+        with timed("Element wait", logger):
+            element = WebDriverWait(driver, 10).until(EC.presence_of_element_located((by, selector)))
         
-        start_fill = time.time()
-        element.clear()
-        element.send_keys(value)
-        logger.debug(f"⏱️ Form filling took {time.time() - start_fill:.3f}s")
+        with timed("Form filling", logger):
+            browser_manager.mark_page_changed()
+            element.clear()
+            element.send_keys(value)
         
         logger.info(f"✅ Successfully filled form field with {len(value)} characters")
         return f"Successfully filled form field with value: {value}"
@@ -241,13 +338,13 @@ def execute_javascript(script: str) -> str:
     logger.info(f"🔧 Executing JavaScript ({len(script)} chars)")
     logger.debug(f"📜 JavaScript code: {script[:500]}{'...' if len(script) > 500 else ''}")
     try:
-        start_driver = time.time()
-        driver = browser_manager.get_driver()
-        logger.debug(f"⏱️ Driver retrieval took {time.time() - start_driver:.3f}s")
+        with timed("Driver retrieval", logger):
+            driver = browser_manager.get_driver()
         
-        start_exec = time.time()
-        result = driver.execute_script(script)
-        logger.debug(f"⏱️ JavaScript execution took {time.time() - start_exec:.3f}s")
+        with timed("JavaScript execution", logger):
+            # Scripts can rewrite the DOM or document.cookie
+            browser_manager.mark_page_changed()
+            result = driver.execute_script(script)
         
         logger.info(f"✅ JavaScript executed successfully. Result type: {type(result).__name__}")
         logger.debug(f"📤 JavaScript result: {str(result)[:200]}{'...' if len(str(result)) > 200 else ''}")
@@ -267,38 +364,60 @@ def get_page_info() -> str:
     """
     logger.info("📊 Getting current page state with full HTML")
     try:
-        start_driver = time.time()
-        driver = browser_manager.get_driver()
-        logger.debug(f"⏱️ Driver retrieval took {time.time() - start_driver:.3f}s")
-        
-        start_basic = time.time()
-        current_url = driver.current_url
-        title = driver.title
-        cookies = driver.get_cookies()
-        page_source = driver.page_source
-        logger.debug(f"⏱️ Basic page info collection took {time.time() - start_basic:.3f}s")
+        with timed("Driver retrieval", logger):
+            driver = browser_manager.get_driver()
         
-        start_elements = time.time()
-        # Get some useful page elements
-        logger.debug(f"⏱️ Element collection took {time.time() - start_elements:.3f}s")
+        with timed("Basic page info collection", logger):
+            current_url = driver.current_url
+            title = driver.title
+            cookies = browser_manager.get_cookies()
+            page_source = driver.page_source
         
         logger.info(f"📄 Page: '{title}' ({len(page_source)} chars HTML)")
         
-        start_build = time.time()
-        result = f"""
-Current URL: {current_url}
-Title: {title}
-Cookies: {cookies}
-"""
-        result += f"\n\nFULL HTML SOURCE:\n{'-'*50}\n{page_source}\n{'-'*50}\n"
-        logger.debug(f"⏱️ Result building took {time.time() - start_build:.3f}s")
-        
-        return result
+        # Joined once so the full page source is copied a single time into the result
+        divider = '-' * 50
+        return "".join((
+            f"\nCurrent URL: {current_url}\nTitle: {title}\nCookies: {cookies}\n",
+            f"\n\nFULL HTML SOURCE:\n{divider}\n",
+            page_source,
+            f"\n{divider}\n",
+        ))
         
     except Exception as e:
         logger.error(f"❌ Error getting page info: {str(e)}")
         return f"Error getting page info: {str(e)}"
 
+# fetch_contents only shows the start of a response body to the agent
+MAX_CONTENT_CHARS = 10000
+
+# Shared HTTP session so repeated fetches to the target reuse keep-alive connections
+# instead of paying a new TCP/TLS handshake each time. Its cookie jar rejects every
+# cookie: each request sends exactly the browser's cookies, never ones left over
+# from earlier responses.
+http_session = requests.Session()
+http_session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+_http_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+http_session.mount("http://", _http_adapter)
+http_session.mount("https://", _http_adapter)
+
+def _read_capped_text(response: requests.Response, max_chars: int) -> str:
+    """Read at most max_chars characters of a streamed response body and close it.
+
+    Large bodies are never fully downloaded or decoded.
+    """
+    # 4 bytes per character covers any UTF-8 sequence
+    max_bytes = max_chars * 4
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(chunk_size=8192):
+            body.extend(chunk)
+            if len(body) >= max_bytes:
+                break
+    finally:
+        response.close()
+    return bytes(body[:max_bytes]).decode(response.encoding or 'utf-8', errors='replace')[:max_chars]
+
 @tool
 @timing_decorator
 def fetch_contents(url: str, method: str = "GET", headers: Dict[str, str] = None, data: str = None) -> str:
@@ -330,17 +449,15 @@ def fetch_contents(url: str, method: str = "GET", headers: Dict[str, str] = None
     try:
         # Get current browser cookies if browser is active
         cookies = {}
-        start_cookies = time.time()
         try:
-            driver = browser_manager.get_driver()
-            browser_cookies = driver.get_cookies()
+            with timed("Cookie retrieval", logger):
+                browser_cookies = browser_manager.get_cookies()
             
             # Convert Selenium cookies to requests format
             for cookie in browser_cookies:
                 cookies[cookie['name']] = cookie['value']
                 
             logger.debug(f"🍪 Using {len(cookies)} cookies from browser session")
-            logger.debug(f"⏱️ Cookie retrieval took {time.time() - start_cookies:.3f}s")
             
         except Exception as cookie_error:
             logger.warning(f"⚠️ Could not get browser cookies: {cookie_error}")
@@ -356,21 +473,22 @@ def fetch_contents(url: str, method: str = "GET", headers: Dict[str, str] = None
         logger.debug(f"📋 Request headers: {request_headers}")
         logger.debug(f"📦 Request data length: {len(data) if data else 0}")
         
-        start_request = time.time()
-        response = requests.request(
-            method=method.upper(),
-            url=url,
-            headers=request_headers,
-            cookies=cookies,
-            data=data,
-            timeout=10
-        )
-        logger.debug(f"⏱️ HTTP request took {time.time() - start_request:.3f}s")
+        with timed("HTTP request", logger):
+            response = http_session.request(
+                method=method.upper(),
+                url=url,
+                headers=request_headers,
+                cookies=cookies,
+                data=data,
+                timeout=10,
+                stream=True
+            )
+            content = _read_capped_text(response, MAX_CONTENT_CHARS)
         
         # Get response cookies for future reference
-        response_cookies = dict(response.cookies)
+        response_cookies = [f"{c.name}={c.value}" for c in response.cookies]
         
-        logger.info(f"📥 Response: {response.status_code} ({len(response.text)} chars)")
+        logger.info(f"📥 Response: {response.status_code} ({len(content)} chars read)")
         logger.debug(f"🍪 Response cookies: {len(response_cookies)} received")
         
         result = f"""
@@ -380,8 +498,8 @@ Request Cookies Used: {cookies}
 Response Cookies: {response_cookies}
 Response Headers: {dict(response.headers)}
 
-Content (first 10000 characters):
-{response.text[:10000]}
+Content (first {MAX_CONTENT_CHARS} characters):
+{content}
 """
         
         return result
@@ -408,14 +526,12 @@ def get_console_logs() -> str:
     """
     logger.info("📝 Getting JavaScript console logs")
     try:
-        start_driver = time.time()
-        driver = browser_manager.get_driver()
-        logger.debug(f"⏱️ Driver retrieval took {time.time() - start_driver:.3f}s")
+        with timed("Driver retrieval", logger):
+            driver = browser_manager.get_driver()
         
         # Get console logs
-        start_logs = time.time()
-        logs = driver.get_log('browser')
-        logger.debug(f"⏱️ Log retrieval took {time.time() - start_logs:.3f}s")
+        with timed("Log retrieval", logger):
+            logs = driver.get_log('browser')
         logger.debug(f"🔍 Raw browser logs: {logs}")
         
         if not logs:
@@ -424,8 +540,7 @@ def get_console_logs() -> str:
         
         logger.info(f"📝 Found {len(logs)} console log entries")
         
-        start_process = time.time()
-        result = f"Found {len(logs)} console log entries:\n\n"
+        parts = [f"Found {len(logs)} console log entries:\n\n"]
         
         for i, log_entry in enumerate(logs):
             timestamp = log_entry.get('timestamp', 'Unknown')
@@ -433,13 +548,15 @@ def get_console_logs() -> str:
             message = log_entry.get('message', 'No message')
             source = log_entry.get('source', 'Unknown')
             
-            result += f"Entry {i+1}:\n"
-            result += f"  Level: {level}\n"
-            result += f"  Source: {source}\n"
-            result += f"  Timestamp: {timestamp}\n"
-            result += f"  Message: {message}\n\n"
+            parts.append(
+                f"Entry {i+1}:\n"
+                f"  Level: {level}\n"
+                f"  Source: {source}\n"
+                f"  Timestamp: {timestamp}\n"
+                f"  Message: {message}\n\n"
+            )
         
-        logger.debug(f"⏱️ Log processing took {time.time() - start_process:.3f}s")
+        result = "".join(parts)
         logger.debug(f"📤 Console logs result: {result[:200]}{'...' if len(result) > 200 else ''}")
         return result
         
@@ -447,7 +564,6 @@ def get_console_logs() -> str:
         logger.warning(f"⚠️ Browser logs API failed: {str(e)}, trying JavaScript fallback")
         # If browser logs aren't available, try to get them via JavaScript
         try:
-            start_fallback = time.time()
             driver = browser_manager.get_driver()
             
             # Inject JavaScript to capture console logs
@@ -479,22 +595,24 @@ def get_console_logs() -> str:
             return window.consoleCapture || [];
             """
             
-            captured_logs = driver.execute_script(console_script)
-            logger.debug(f"⏱️ JavaScript fallback took {time.time() - start_fallback:.3f}s")
+            with timed("JavaScript fallback", logger):
+                captured_logs = driver.execute_script(console_script)
             
             if not captured_logs:
                 logger.info("📝 No captured console logs available, logging enabled for future")
                 return f"No console logs available. Console logging has been enabled for future messages. Error accessing browser logs: {str(e)}"
             
             logger.info(f"📝 Found {len(captured_logs)} captured console messages via JavaScript")
-            result = f"Found {len(captured_logs)} captured console messages:\n\n"
+            parts = [f"Found {len(captured_logs)} captured console messages:\n\n"]
             for i, log in enumerate(captured_logs):
-                result += f"Entry {i+1}:\n"
-                result += f"  Level: {log.get('level', 'Unknown')}\n"
-                result += f"  Message: {log.get('message', 'No message')}\n"
-                result += f"  Timestamp: {log.get('timestamp', 'Unknown')}\n\n"
+                parts.append(
+                    f"Entry {i+1}:\n"
+                    f"  Level: {log.get('level', 'Unknown')}\n"
+                    f"  Message: {log.get('message', 'No message')}\n"
+                    f"  Timestamp: {log.get('timestamp', 'Unknown')}\n\n"
+                )
             
-            return result
+            return "".join(parts)
             
         except Exception as inner_e:
             logger.error(f"❌ JavaScript fallback also failed: {str(inner_e)}")